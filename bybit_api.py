@@ -1,80 +1,525 @@
 """
 Bybit API Client for DiscordAlertsTrader
 Supports crypto trading via Bybit's V5 API
+
+Requests go through a shared httpx.AsyncClient so that the TCP+TLS
+connection to Bybit is pooled and reused between calls. The client methods
+are coroutines, run them inside an event loop with run(), which uses uvloop
+when installed (Linux/macOS only) and asyncio's default loop otherwise.
+
+Ticker prices can also be streamed from Bybit's public websocket with
+start_ticker_stream, get_ticker_price then reads the last pushed price from
+memory and only calls the REST API for symbols not streamed. Bybit is hosted
+in AWS ap-southeast-1 (Singapore), run the bot there for the lowest latency.
+
+All I/O runs on the running asyncio event loop, the client does not pick a
+transport of its own. HTTP/2 multiplexing already sends concurrent requests
+over one pooled socket, so colocated deployments get fewer syscalls from
+batching calls (get_ticker_prices, close_positions) rather than from a
+custom io_uring transport.
 """
 
-from pybit.unified_trading import HTTP
+import asyncio
+import copy
+from decimal import Decimal
+import functools
+import hashlib
+import hmac
+import json
 import logging
-from typing import Dict, List, Optional, Union
+import re
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode
 import time
 
+import httpx
+import orjson
+import websockets
+
+if TYPE_CHECKING:
+    from pybit.unified_trading import HTTP
+
 logger = logging.getLogger(__name__)
 
+MAINNET_URL = "https://api.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+# Max ms between the request timestamp and Bybit receiving it
+RECV_WINDOW = "5000"
+MAX_CONNECTIONS = 100
+# Max records per page of /v5/order/history
+ORDER_HISTORY_PAGE = 50
+# Max orders per batch request, 20 except for spot
+BATCH_SIZE = {"spot": 10}
+DEFAULT_BATCH_SIZE = 20
+# Seconds enqueued orders wait to be sent in the same batch
+BATCH_DELAY = 0.005
+MAINNET_WS_URL = "wss://stream.bybit.com/v5/public/{category}"
+TESTNET_WS_URL = "wss://stream-testnet.bybit.com/v5/public/{category}"
+MAINNET_PRIVATE_WS_URL = "wss://stream.bybit.com/v5/private"
+TESTNET_PRIVATE_WS_URL = "wss://stream-testnet.bybit.com/v5/private"
+# Seconds before reconnecting the private websocket after an error, doubled up to 30s
+WS_RECONNECT_DELAY = 1.0
+# Seconds to wait for the reply to a private websocket auth or subscribe
+WS_REPLY_TIMEOUT = 10.0
+# Seconds a pushed order is kept once it reached a final status
+ORDER_DONE_TTL = 60.0
+_DONE_STATUSES = frozenset(
+    ("Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled")
+)
+
+# Crypto base coins traded from alerts, quoted in USDT
+CRYPTO_BASES = ("BTC", "ETH", "SOL", "DOGE", "XRP", "ADA", "MATIC", "AVAX", "DOT", "LINK")
+
+# Crypto symbol in an alert, optionally followed by the quote (BTC, BTCUSDT, BTC/USD, ETH-USDT)
+_CRYPTO_RE = re.compile(
+    r'\b(' + '|'.join(CRYPTO_BASES) + r')(?:[/\-]?USDT?)?\b',
+    re.IGNORECASE
+)
+# Symbols already in Bybit format, matched without the regex
+_CANONICAL = frozenset(f"{b}USDT" for b in CRYPTO_BASES)
+
+# Connection pool shared by every BybitClient, keyed by base url and event loop.
+# Pooled connections belong to the loop that opened them, so each loop gets its own.
+_SESSIONS: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _get_session(base_url: str) -> httpx.AsyncClient:
+    """
+    Get the shared httpx.AsyncClient for a Bybit endpoint in the running event
+    loop, creating it on first use
+
+    Args:
+        base_url: Bybit REST base url
+
+    Returns:
+        Pooled async http client
+    """
+    loop = asyncio.get_running_loop()
+    key = (base_url, id(loop))
+    entry = _SESSIONS.get(key)
+    # the loop is kept in the entry, so its id can not be reused while pooled
+    if entry is not None and not entry[1].is_closed:
+        return entry[1]
+
+    # forget pools of loops that are gone
+    for k, (other_loop, _) in list(_SESSIONS.items()):
+        if other_loop.is_closed():
+            del _SESSIONS[k]
+
+    session = httpx.AsyncClient(
+        base_url=base_url,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=40,
+            keepalive_expiry=30
+        ),
+        timeout=30.0
+    )
+    _SESSIONS[key] = (loop, session)
+    return session
+
+
+def _fast_json(content: Union[str, bytes]):
+    """
+    Decode a Bybit json payload with orjson
+    """
+    return orjson.loads(content)
+
+
+def _timestamp() -> str:
+    """
+    Current time in ms as Bybit expects it, integer math only
+    """
+    return str(time.time_ns() // 1_000_000)
+
+
+def _fmt_num(value: Union[str, int, float]) -> str:
+    """
+    Format a number as the plain decimal string Bybit expects (no exponent)
+    """
+    text = str(value)
+    if "e" in text or "E" in text:
+        text = format(Decimal(text), "f")
+    return text
+
+
+def _order_params(
+    symbol: str,
+    side: str,
+    order_type: str,
+    qty: float,
+    price: Optional[float] = None,
+    stop_loss: Optional[float] = None,
+    take_profit: Optional[float] = None,
+    time_in_force: str = "GTC",
+    reduce_only: bool = False
+) -> Dict:
+    """
+    Build the body of an order, without category, see BybitClient.place_order
+    """
+    order_params = {
+        "symbol": symbol,
+        "side": side,
+        "orderType": order_type,
+        "qty": _fmt_num(qty),
+        "timeInForce": time_in_force
+    }
+
+    # Add price for limit orders
+    if order_type == "Limit" and price:
+        order_params["price"] = _fmt_num(price)
+
+    # Add stop loss and take profit if provided
+    if stop_loss:
+        order_params["stopLoss"] = _fmt_num(stop_loss)
+    if take_profit:
+        order_params["takeProfit"] = _fmt_num(take_profit)
+    if reduce_only:
+        order_params["reduceOnly"] = True
+    return order_params
+
+
+class BybitAPIError(Exception):
+    """
+    Error returned by Bybit in the response body (retCode != 0)
+    """
+
+    def __init__(self, ret_code: int, ret_msg: str):
+        self.ret_code = ret_code
+        self.ret_msg = ret_msg
+        super().__init__(f"{ret_msg} (ErrCode: {ret_code})")
+
+
+# retCodes of requests Bybit rejected without executing, safe to resend
+_REJECTED_CODES = {10002, 10006}
+# retCodes of server side failures, the request may have been executed
+_SERVER_CODES = {10000, 10016}
+
+
+def _is_retriable(exc: Exception, idempotent: bool = True) -> bool:
+    """
+    Check if a failed request is transient and can be sent again
+
+    Args:
+        exc: Exception raised by the request
+        idempotent: Whether resending is harmless if the first attempt was executed
+
+    Returns:
+        True if the request should be retried
+    """
+    if isinstance(exc, BybitAPIError):
+        return exc.ret_code in _REJECTED_CODES or (idempotent and exc.ret_code in _SERVER_CODES)
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or (idempotent and status >= 500)
+    # never reached Bybit
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return idempotent and isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def _error_dict(exc: Exception) -> Dict:
+    """
+    Default response of order methods that failed
+    """
+    return {"error": str(exc)}
+
+
+def _bybit_call(default=None, retries: int = 3, idempotent: bool = True):
+    """
+    Decorate a BybitClient coroutine to retry transient errors with exponential backoff
+
+    Network errors and Bybit errors (retCode != 0) return default once retries are
+    exhausted or if they are not transient, any other exception is raised.
+
+    Args:
+        default: Value returned on failure, or callable building it from the exception
+        retries: Max number of retries
+        idempotent: False for requests that must not be sent twice (e.g. new orders),
+            then only errors where Bybit did not execute the request are retried
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            attempt = 0
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except (httpx.HTTPError, asyncio.TimeoutError, BybitAPIError) as e:
+                    if attempt < retries and _is_retriable(e, idempotent):
+                        await asyncio.sleep(2 ** attempt * 0.05)
+                        attempt += 1
+                        continue
+                    if logger.isEnabledFor(logging.ERROR):
+                        logger.error(f"Error in {func.__name__}: {e}")
+                    return default(e) if callable(default) else copy.copy(default)
+        return wrapper
+    return decorator
+
 
 class BybitClient:
     """
     Bybit API client for executing crypto trades
     """
-    
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
+
+    __slots__ = (
+        "api_key", "api_secret", "testnet", "ticker_ttl", "positions_ttl",
+        "_base_url", "_session", "_sync_session", "_hmac_template", "_key_window",
+        "_ticker_cache", "_positions_cache", "_ws_prices", "_ticker_ws_task",
+        "_positions", "_orders", "_private_ws_task", "_private_ws_connected",
+        "_pending", "_pending_event", "_batch_task",
+    )
+
+    _DEFAULT_CATEGORY = "linear"
+    _DEFAULT_SETTLE = "USDT"
+    _DEFAULT_TIF = "GTC"
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        testnet: bool = False,
+        ticker_ttl: float = 0.5,
+        positions_ttl: float = 1.0
+    ):
         """
         Initialize Bybit client
-        
+
         Args:
             api_key: Bybit API key
             api_secret: Bybit API secret
             testnet: Use testnet environment (default: False)
+            ticker_ttl: Seconds a fetched ticker price is reused (default: 0.5)
+            positions_ttl: Seconds fetched positions are reused (default: 1.0)
         """
         self.api_key = api_key
         self.api_secret = api_secret
         self.testnet = testnet
-        
-        # Initialize Bybit HTTP session
-        self.session = HTTP(
-            testnet=testnet,
-            api_key=api_key,
-            api_secret=api_secret
-        )
-        
+        self.ticker_ttl = ticker_ttl
+        self.positions_ttl = positions_ttl
+        # pre-keyed HMAC, copied for every signature
+        self._hmac_template = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        # fixed part of the signed prehash, after the timestamp
+        self._key_window = (api_key + RECV_WINDOW).encode()
+
+        # (symbol, category) -> (price, expires_at)
+        self._ticker_cache: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        # category -> (positions, positions by symbol, expires_at)
+        self._positions_cache: Dict[str, Tuple[List[Dict], Dict[str, Dict], float]] = {}
+        # (symbol, category) -> last price pushed by the ticker websocket
+        self._ws_prices: Dict[Tuple[str, str], float] = {}
+        self._ticker_ws_task: Optional[asyncio.Task] = None
+        # pushed by the private websocket: category -> symbol -> position, orderId -> order
+        self._positions: Dict[str, Dict[str, Dict]] = {}
+        self._orders: Dict[str, Dict] = {}
+        self._private_ws_task: Optional[asyncio.Task] = None
+        self._private_ws_connected = False
+        # orders waiting for the next batch: (category, order params, future)
+        self._pending: List[Tuple[str, Dict, asyncio.Future]] = []
+        self._pending_event: Optional[asyncio.Event] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+        # Shared Bybit HTTP session, pooled across clients of the same event loop
+        self._base_url = TESTNET_URL if testnet else MAINNET_URL
+        self._session: Optional[httpx.AsyncClient] = None
+        # pybit session, only created if requested
+        self._sync_session = None
+
         logger.info(f"Bybit client initialized (Testnet: {testnet})")
-    
-    def get_account_info(self) -> Dict:
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """
+        Async http session of the running event loop, shared with other clients
+        """
+        if self._session is not None:
+            return self._session
+        return _get_session(self._base_url)
+
+    @session.setter
+    def session(self, session: Optional[httpx.AsyncClient]):
+        # use a specific session instead of the shared pool, None goes back to the pool
+        self._session = session
+
+    async def aclose(self):
+        """
+        Stop the streams and order batching and close the http session of the running loop
+
+        The session is shared by the clients of this event loop, they will open a new one
+        on their next request.
+        """
+        self.stop_order_batching()
+        self.stop_ticker_stream()
+        self.stop_private_stream()
+        await self.session.aclose()
+
+    async def __aenter__(self) -> "BybitClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    @property
+    def sync_session(self) -> "HTTP":
+        """
+        Blocking pybit session, fallback for endpoints not wrapped by this client
+        """
+        if self._sync_session is None:
+            # pybit and requests are only imported when the fallback is used
+            from pybit.unified_trading import HTTP
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            self._sync_session = HTTP(
+                testnet=self.testnet,
+                api_key=self.api_key,
+                api_secret=self.api_secret
+            )
+            # keep TCP+TLS connections alive between pybit calls
+            adapter = HTTPAdapter(
+                pool_connections=20,
+                pool_maxsize=100,
+                max_retries=Retry(total=3, backoff_factor=0.1,
+                                  status_forcelist=[429, 500, 502, 503, 504])
+            )
+            client = self._sync_session.client
+            client.mount("https://", adapter)
+            client.headers["Connection"] = "keep-alive"
+        return self._sync_session
+
+    def _sign(self, timestamp: str, payload: bytes) -> str:
+        """
+        Sign a request following Bybit V5 HMAC-SHA256 scheme
+
+        Args:
+            timestamp: Request timestamp in ms
+            payload: Query string for GET, json body for POST
+
+        Returns:
+            Hex signature
+        """
+        h = self._hmac_template.copy()
+        h.update(timestamp.encode())
+        h.update(self._key_window)
+        h.update(payload)
+        return h.hexdigest()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict] = None,
+        auth: bool = True,
+        timestamp: Optional[str] = None
+    ) -> Dict:
+        """
+        Send a request to Bybit and return the decoded response
+
+        Args:
+            method: "GET" or "POST"
+            path: Endpoint path (e.g., "/v5/position/list")
+            params: Query parameters for GET, body for POST
+            auth: Sign the request
+            timestamp: Signing timestamp in ms, shared by requests sent together.
+                Current time if None
+
+        Returns:
+            Dict with the response
+        """
+        params = params or {}
+        if method == "GET":
+            # keep "%" as is, cursors are returned by Bybit already percent-encoded
+            query = urlencode(params, safe="%")
+            url = f"{path}?{query}" if query else path
+            payload = query.encode()
+        else:
+            payload = orjson.dumps(params)
+            url = path
+
+        headers = {"Content-Type": "application/json"}
+        if auth:
+            timestamp = timestamp or _timestamp()
+            headers.update({
+                "X-BAPI-API-KEY": self.api_key,
+                "X-BAPI-TIMESTAMP": timestamp,
+                "X-BAPI-RECV-WINDOW": RECV_WINDOW,
+                "X-BAPI-SIGN": self._sign(timestamp, payload),
+            })
+
+        if method == "GET":
+            response = await self.session.get(url, headers=headers)
+        else:
+            response = await self.session.post(url, content=payload, headers=headers)
+        response.raise_for_status()
+
+        data = _fast_json(response.content)
+        if data.get("retCode", 0) != 0:
+            raise BybitAPIError(data.get("retCode"), data.get("retMsg", ""))
+        return data
+
+    @_bybit_call(default={})
+    async def get_account_info(self) -> Dict:
         """
         Get account information
-        
+
         Returns:
             Dict containing account information
         """
-        try:
-            response = self.session.get_wallet_balance(
-                accountType="UNIFIED"
-            )
-            return response
-        except Exception as e:
-            logger.error(f"Error getting account info: {e}")
-            return {}
-    
-    def get_positions(self, category: str = "linear") -> List[Dict]:
+        response = await self._request(
+            "GET", "/v5/account/wallet-balance",
+            {"accountType": "UNIFIED"}
+        )
+        return response
+
+    @_bybit_call(default=[])
+    async def get_positions(self, category: str = _DEFAULT_CATEGORY) -> List[Dict]:
         """
         Get current positions
-        
+
         Args:
             category: Product type (linear, inverse, spot)
-            
+
         Returns:
             List of position dictionaries
         """
-        try:
-            response = self.session.get_positions(
-                category=category,
-                settleCoin="USDT"
-            )
-            return response.get('result', {}).get('list', [])
-        except Exception as e:
-            logger.error(f"Error getting positions: {e}")
-            return []
-    
-    def place_order(
+        if self._private_ws_connected and category in self._positions:
+            return list(self._positions[category].values())
+
+        now = time.monotonic()
+        cached = self._positions_cache.get(category)
+        if cached and cached[2] > now:
+            return cached[0]
+
+        positions = await self._fetch_positions(category)
+        by_symbol = {p['symbol']: p for p in positions}
+        self._positions_cache[category] = (positions, by_symbol, now + self.positions_ttl)
+        return positions
+
+    async def _fetch_positions(self, category: str) -> List[Dict]:
+        """
+        Request the positions from the REST API, errors are raised to the caller
+        """
+        response = await self._request(
+            "GET", "/v5/position/list",
+            {"category": category, "settleCoin": self._DEFAULT_SETTLE}
+        )
+        return response.get('result', {}).get('list', [])
+
+    async def _positions_by_symbol(self, category: str = _DEFAULT_CATEGORY) -> Dict[str, Dict]:
+        """
+        Get current positions keyed by symbol, shares the get_positions cache
+        """
+        if self._private_ws_connected and category in self._positions:
+            return self._positions[category]
+        positions = await self.get_positions(category=category)
+        cached = self._positions_cache.get(category)
+        if cached and cached[0] is positions:
+            return cached[1]
+        return {p['symbol']: p for p in positions}
+
+    @_bybit_call(default=_error_dict, idempotent=False)
+    async def place_order(
         self,
         symbol: str,
         side: str,
@@ -83,12 +528,13 @@ class BybitClient:
         price: Optional[float] = None,
         stop_loss: Optional[float] = None,
         take_profit: Optional[float] = None,
-        category: str = "linear",
-        time_in_force: str = "GTC"
+        category: str = _DEFAULT_CATEGORY,
+        time_in_force: str = _DEFAULT_TIF,
+        reduce_only: bool = False
     ) -> Dict:
         """
         Place an order on Bybit
-        
+
         Args:
             symbol: Trading pair (e.g., "BTCUSDT")
             side: "Buy" or "Sell"
@@ -99,208 +545,708 @@ class BybitClient:
             take_profit: Take profit price
             category: Product type (linear, inverse, spot)
             time_in_force: Time in force (GTC, IOC, FOK)
-            
+            reduce_only: Only reduce the open position, never open a new one
+
         Returns:
             Dict containing order response
         """
+        order_params = _order_params(
+            symbol, side, order_type, qty, price, stop_loss, take_profit, time_in_force,
+            reduce_only
+        )
+        order_params["category"] = category
+
+        response = await self._request("POST", "/v5/order/create", order_params)
+        # positions are about to change, drop the cached ones
+        self._positions_cache.pop(category, None)
+        logger.info(f"Order placed: {response}")
+        return response
+
+    async def bulk_place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """
+        Place several orders concurrently, bounded by the connection pool size
+
+        Args:
+            orders: List of place_order keyword arguments
+
+        Returns:
+            List of order responses, in the same order as orders
+        """
+        semaphore = asyncio.Semaphore(MAX_CONNECTIONS)
+
+        async def _place(order):
+            async with semaphore:
+                return await self.place_order(**order)
+
+        return await asyncio.gather(*(_place(o) for o in orders))
+
+    async def _close(self, symbol: str, position: Optional[Dict], category: str) -> Dict:
+        """
+        Send the market order that flattens a position
+        """
+        if not position or float(position.get('size', 0)) == 0:
+            logger.warning(f"No open position found for {symbol}")
+            return {"error": "No open position"}
+
+        # Determine side to close (opposite of current position)
+        side = "Sell" if position['side'] == "Buy" else "Buy"
+        qty = abs(float(position['size']))
+
+        # Place market order to close, reduce only as the position may be
+        # cached and already closed by the exchange (stop loss, take profit)
+        return await self.place_order(
+            symbol=symbol,
+            side=side,
+            order_type="Market",
+            qty=qty,
+            category=category,
+            reduce_only=True
+        )
+
+    async def _send_batch(
+        self, path: str, orders: List[Dict], category: str, timestamp: str
+    ) -> List[Dict]:
+        """
+        Send one batch request and split the response per order
+        """
         try:
-            order_params = {
-                "category": category,
-                "symbol": symbol,
-                "side": side,
-                "orderType": order_type,
-                "qty": str(qty),
-                "timeInForce": time_in_force
-            }
-            
-            # Add price for limit orders
-            if order_type == "Limit" and price:
-                order_params["price"] = str(price)
-            
-            # Add stop loss and take profit if provided
-            if stop_loss:
-                order_params["stopLoss"] = str(stop_loss)
-            if take_profit:
-                order_params["takeProfit"] = str(take_profit)
-            
-            response = self.session.place_order(**order_params)
-            logger.info(f"Order placed: {response}")
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error placing order: {e}")
-            return {"error": str(e)}
-    
-    def close_position(
+            response = await self._request(
+                "POST", path, {"category": category, "request": orders}, timestamp=timestamp
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError, BybitAPIError) as e:
+            logger.error(f"Error sending batch {path}: {e}")
+            return [{"error": str(e)} for _ in orders]
+
+        results = response.get('result', {}).get('list', [])
+        infos = response.get('retExtInfo', {}).get('list', [])
+        out = []
+        for result, info in zip(results, infos):
+            if info.get('code', 0) != 0:
+                out.append({"error": f"{info.get('msg')} (ErrCode: {info.get('code')})"})
+            else:
+                out.append({"retCode": 0, "retMsg": info.get('msg', "OK"), "result": result})
+        out.extend({"error": "No response for order in batch"} for _ in orders[len(out):])
+        return out
+
+    async def _batch(
+        self, path: str, orders: List[Dict], category: str, timestamp: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Split orders in batches of the category max size and send them concurrently,
+        all signed with the same timestamp
+        """
+        timestamp = timestamp or _timestamp()
+        size = BATCH_SIZE.get(category, DEFAULT_BATCH_SIZE)
+        chunks = [orders[i:i + size] for i in range(0, len(orders), size)]
+        results = await asyncio.gather(
+            *(self._send_batch(path, c, category, timestamp) for c in chunks)
+        )
+        return [r for chunk in results for r in chunk]
+
+    async def place_orders_batch(
+        self,
+        orders: List[Dict],
+        category: str = _DEFAULT_CATEGORY,
+        timestamp: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Place several orders with /v5/order/create-batch, up to 20 per request
+
+        Args:
+            orders: Order bodies without category (symbol, side, orderType, qty, ...)
+            category: Product type
+            timestamp: Signing timestamp in ms, current time if None
+
+        Returns:
+            List of order responses, in the same order as orders
+        """
+        results = await self._batch("/v5/order/create-batch", orders, category, timestamp)
+        # positions are about to change, drop the cached ones
+        self._positions_cache.pop(category, None)
+        logger.info(f"Batch orders placed: {results}")
+        return results
+
+    async def cancel_orders_batch(self, orders: List[Dict], category: str = _DEFAULT_CATEGORY) -> List[Dict]:
+        """
+        Cancel several orders with /v5/order/cancel-batch, up to 20 per request
+
+        Args:
+            orders: Dicts with symbol and orderId
+            category: Product type
+
+        Returns:
+            List of cancel responses, in the same order as orders
+        """
+        results = await self._batch("/v5/order/cancel-batch", orders, category)
+        logger.info(f"Batch orders cancelled: {results}")
+        return results
+
+    async def enqueue_order(
         self,
         symbol: str,
-        category: str = "linear"
+        side: str,
+        order_type: str,
+        qty: float,
+        price: Optional[float] = None,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+        category: str = _DEFAULT_CATEGORY,
+        time_in_force: str = _DEFAULT_TIF,
+        reduce_only: bool = False
+    ) -> Dict:
+        """
+        Queue an order to be sent with others in a single batch request
+
+        Orders enqueued within a few ms of each other are placed together,
+        same arguments and response as place_order.
+        """
+        if self._batch_task is None or self._batch_task.done():
+            self._pending_event = asyncio.Event()
+            self._batch_task = asyncio.create_task(self._drain_orders())
+
+        future = asyncio.get_running_loop().create_future()
+        order_params = _order_params(
+            symbol, side, order_type, qty, price, stop_loss, take_profit, time_in_force,
+            reduce_only
+        )
+        self._pending.append((category, order_params, future))
+        self._pending_event.set()
+        return await future
+
+    async def _drain_orders(self):
+        """
+        Send the enqueued orders in batches, grouped by category
+        """
+        while True:
+            await self._pending_event.wait()
+            await asyncio.sleep(BATCH_DELAY)
+            self._pending_event.clear()
+            pending, self._pending = self._pending, []
+            # one timestamp signs every request of this drain
+            timestamp = _timestamp()
+
+            by_category: Dict[str, List[Tuple[Dict, asyncio.Future]]] = {}
+            for category, order_params, future in pending:
+                by_category.setdefault(category, []).append((order_params, future))
+
+            async def _send(category, items):
+                try:
+                    results = await self.place_orders_batch([o for o, _ in items], category, timestamp)
+                except Exception as e:
+                    # fail these orders only, the loop keeps sending the next ones
+                    logger.error(f"Error sending enqueued {category} orders: {e}")
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+                for (_, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+            try:
+                # concurrently, so every category is sent while the timestamp is fresh
+                await asyncio.gather(*(_send(c, items) for c, items in by_category.items()))
+            except asyncio.CancelledError:
+                # the orders already left the queue, don't leave their callers waiting
+                for _, _, future in pending:
+                    future.cancel()
+                raise
+
+    def stop_order_batching(self):
+        """
+        Stop the batch sender, orders still queued are cancelled
+        """
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            self._batch_task = None
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending = []
+
+    async def close_position(
+        self,
+        symbol: str,
+        category: str = _DEFAULT_CATEGORY
     ) -> Dict:
         """
         Close an existing position
-        
+
         Args:
             symbol: Trading pair (e.g., "BTCUSDT")
             category: Product type
-            
+
         Returns:
             Dict containing close response
         """
-        try:
-            # Get current position
-            positions = self.get_positions(category=category)
-            position = next((p for p in positions if p['symbol'] == symbol), None)
-            
-            if not position or float(position.get('size', 0)) == 0:
-                logger.warning(f"No open position found for {symbol}")
-                return {"error": "No open position"}
-            
-            # Determine side to close (opposite of current position)
-            side = "Sell" if position['side'] == "Buy" else "Buy"
-            qty = abs(float(position['size']))
-            
-            # Place market order to close
-            return self.place_order(
-                symbol=symbol,
-                side=side,
-                order_type="Market",
-                qty=qty,
-                category=category
-            )
-            
-        except Exception as e:
-            logger.error(f"Error closing position: {e}")
-            return {"error": str(e)}
-    
-    def cancel_order(self, order_id: str, symbol: str, category: str = "linear") -> Dict:
+        position = (await self._positions_by_symbol(category)).get(symbol)
+        return await self._close(symbol, position, category)
+
+    async def close_positions(
+        self,
+        symbols: List[str],
+        category: str = _DEFAULT_CATEGORY
+    ) -> Dict[str, Dict]:
+        """
+        Close several positions, fetching positions once and closing concurrently
+
+        Args:
+            symbols: Trading pairs (e.g., ["BTCUSDT", "ETHUSDT"])
+            category: Product type
+
+        Returns:
+            Dict of symbol to close response
+        """
+        by_symbol = await self._positions_by_symbol(category)
+        results = await asyncio.gather(
+            *(self._close(s, by_symbol.get(s), category) for s in symbols),
+            return_exceptions=True
+        )
+        return {
+            s: {"error": str(r)} if isinstance(r, Exception) else r
+            for s, r in zip(symbols, results)
+        }
+
+    @_bybit_call(default=_error_dict, idempotent=False)
+    async def cancel_order(self, order_id: str, symbol: str, category: str = _DEFAULT_CATEGORY) -> Dict:
         """
         Cancel an existing order
-        
+
         Args:
             order_id: Order ID to cancel
             symbol: Trading pair
             category: Product type
-            
+
         Returns:
             Dict containing cancel response
         """
+        response = await self._request(
+            "POST", "/v5/order/cancel",
+            {"category": category, "symbol": symbol, "orderId": order_id}
+        )
+        logger.info(f"Order cancelled: {response}")
+        return response
+
+    async def _get_ticker(self, symbol: str, category: str = _DEFAULT_CATEGORY) -> Optional[float]:
+        """
+        Fetch the last price of a symbol, errors are raised to the caller
+        """
+        key = (symbol, category)
+        price = self._ws_prices.get(key)
+        if price is not None:
+            return price
+
+        now = time.monotonic()
+        cached = self._ticker_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        response = await self._request(
+            "GET", "/v5/market/tickers",
+            {"category": category, "symbol": symbol},
+            auth=False
+        )
+        ticker = response.get('result', {}).get('list', [])
+        if ticker:
+            price = float(ticker[0].get('lastPrice', 0))
+            self._ticker_cache[key] = (price, now + self.ticker_ttl)
+            return price
+        return None
+
+    def start_ticker_stream(self, symbols: List[str], category: str = _DEFAULT_CATEGORY) -> asyncio.Task:
+        """
+        Stream ticker prices from Bybit's public websocket in a background task
+
+        Args:
+            symbols: Trading pairs to subscribe (e.g., ["BTCUSDT", "ETHUSDT"])
+            category: Product type
+
+        Returns:
+            The streaming task, cancel it or call stop_ticker_stream to stop
+        """
+        self.stop_ticker_stream()
+        self._ticker_ws_task = asyncio.create_task(self._start_ticker_ws(symbols, category))
+        return self._ticker_ws_task
+
+    def stop_ticker_stream(self):
+        """
+        Stop the ticker websocket, prices go back to the REST API
+        """
+        if self._ticker_ws_task is not None:
+            self._ticker_ws_task.cancel()
+            self._ticker_ws_task = None
+        self._ws_prices.clear()
+
+    async def _start_ticker_ws(self, symbols: List[str], category: str = _DEFAULT_CATEGORY):
+        """
+        Subscribe to tickers.{symbol} and keep the last prices, reconnects on drops
+        """
+        url = (TESTNET_WS_URL if self.testnet else MAINNET_WS_URL).format(category=category)
+        subscribe = json.dumps({"op": "subscribe", "args": [f"tickers.{s}" for s in symbols]})
         try:
-            response = self.session.cancel_order(
-                category=category,
-                symbol=symbol,
-                orderId=order_id
-            )
-            logger.info(f"Order cancelled: {response}")
-            return response
-        except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
-            return {"error": str(e)}
-    
-    def get_ticker_price(self, symbol: str, category: str = "linear") -> Optional[float]:
+            async for ws in websockets.connect(url, ping_interval=20):
+                try:
+                    await ws.send(subscribe)
+                    async for msg in ws:
+                        self._handle_ticker_msg(msg, category)
+                except websockets.ConnectionClosed:
+                    logger.warning("Bybit ticker websocket closed, reconnecting")
+                    continue
+                finally:
+                    # prices freeze while disconnected, use REST until they are pushed again
+                    self._drop_ws_prices(category)
+        finally:
+            self._drop_ws_prices(category)
+
+    def _drop_ws_prices(self, category: str):
+        """
+        Forget the streamed prices of a category
+        """
+        for key in [k for k in self._ws_prices if k[1] == category]:
+            del self._ws_prices[key]
+
+    def _handle_ticker_msg(self, msg: Union[str, bytes], category: str):
+        """
+        Store the last price of a ticker websocket message
+        """
+        data = _fast_json(msg)
+        if not data.get("topic", "").startswith("tickers."):
+            return
+        ticker = data.get("data", {})
+        # deltas only carry the fields that changed
+        if "lastPrice" in ticker:
+            self._ws_prices[(ticker["symbol"], category)] = float(ticker["lastPrice"])
+
+    def start_private_stream(self, category: str = _DEFAULT_CATEGORY) -> asyncio.Task:
+        """
+        Keep positions and orders updated from Bybit's private websocket
+
+        While connected get_positions and get_order read the pushed state
+        instead of calling the REST API.
+
+        Args:
+            category: Product type whose positions are loaded on connect
+
+        Returns:
+            The streaming task, cancel it or call stop_private_stream to stop
+        """
+        self.stop_private_stream()
+        self._private_ws_task = asyncio.create_task(self._start_private_ws(category))
+        return self._private_ws_task
+
+    def stop_private_stream(self):
+        """
+        Stop the private websocket, positions and orders go back to the REST API
+        """
+        if self._private_ws_task is not None:
+            self._private_ws_task.cancel()
+            self._private_ws_task = None
+        self._private_ws_connected = False
+        self._positions.clear()
+        self._orders.clear()
+
+    def _ws_auth_msg(self) -> str:
+        """
+        Build the private websocket auth message
+        """
+        expires = str(time.time_ns() // 1_000_000 + 10000)
+        h = self._hmac_template.copy()
+        h.update(f"GET/realtime{expires}".encode())
+        return json.dumps({"op": "auth", "args": [self.api_key, expires, h.hexdigest()]})
+
+    async def _start_private_ws(self, category: str = _DEFAULT_CATEGORY):
+        """
+        Authenticate, subscribe to position and order updates and apply them,
+        reconnects on drops
+        """
+        url = TESTNET_PRIVATE_WS_URL if self.testnet else MAINNET_PRIVATE_WS_URL
+        subscribe = json.dumps({"op": "subscribe", "args": ["position", "order"]})
+        delay = WS_RECONNECT_DELAY
+        async for ws in websockets.connect(url, ping_interval=20):
+            try:
+                await ws.send(self._ws_auth_msg())
+                if not await self._ws_reply(ws, "auth"):
+                    return
+                await ws.send(subscribe)
+                if not await self._ws_reply(ws, "subscribe"):
+                    return
+                # load current positions, the stream only pushes changes
+                positions = await self._fetch_positions(category)
+                self._positions[category] = {p['symbol']: p for p in positions}
+                self._private_ws_connected = True
+                delay = WS_RECONNECT_DELAY
+                async for msg in ws:
+                    if not self._handle_private_msg(msg):
+                        return
+            except websockets.ConnectionClosed:
+                logger.warning("Bybit private websocket closed, reconnecting")
+                continue
+            except (httpx.HTTPError, asyncio.TimeoutError, BybitAPIError) as e:
+                if not _is_retriable(e):
+                    # e.g. invalid API key or permissions
+                    logger.error(f"Error in Bybit private websocket, stopping: {e}")
+                    return
+                logger.warning(f"Error in Bybit private websocket, reconnecting in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+            finally:
+                # pushed state goes stale once disconnected
+                self._private_ws_connected = False
+                self._positions.clear()
+                self._orders.clear()
+                await ws.close()
+
+    async def _ws_reply(self, ws, op: str) -> bool:
+        """
+        Wait for the reply to a private websocket auth or subscribe, returns whether it succeeded
+
+        Pushes received before the reply are skipped, the positions snapshot is loaded after.
+        """
+        while True:
+            data = _fast_json(await asyncio.wait_for(ws.recv(), WS_REPLY_TIMEOUT))
+            if data.get("op") == op:
+                if not data.get("success"):
+                    logger.error(f"Bybit private websocket {op} failed: {data.get('ret_msg')}")
+                    return False
+                return True
+
+    def _handle_private_msg(self, msg: Union[str, bytes]) -> bool:
+        """
+        Apply a private websocket message, returns False if authentication or subscription failed
+        """
+        data = _fast_json(msg)
+        if data.get("op") in ("auth", "subscribe") and not data.get("success"):
+            logger.error(f"Bybit private websocket {data['op']} failed: {data.get('ret_msg')}")
+            return False
+
+        topic = data.get("topic")
+        if topic == "position":
+            for position in data.get("data", []):
+                category = position.get("category", self._DEFAULT_CATEGORY)
+                # only categories loaded from REST hold the full position state
+                if category in self._positions:
+                    self._positions[category][position["symbol"]] = position
+        elif topic == "order":
+            for order in data.get("data", []):
+                self._orders[order["orderId"]] = order
+                # final orders get no more pushes, forget them after a while
+                if order.get("orderStatus") in _DONE_STATUSES:
+                    asyncio.get_running_loop().call_later(
+                        ORDER_DONE_TTL, self._orders.pop, order["orderId"], None
+                    )
+        return True
+
+    @_bybit_call(default=None)
+    async def get_order(self, order_id: str, category: str = _DEFAULT_CATEGORY) -> Optional[Dict]:
+        """
+        Get an order, from the private websocket if streamed
+
+        Args:
+            order_id: Order ID
+            category: Product type
+
+        Returns:
+            Order dictionary or None
+        """
+        if self._private_ws_connected:
+            order = self._orders.get(order_id)
+            if order is not None:
+                return order
+        response = await self._request(
+            "GET", "/v5/order/realtime",
+            {"category": category, "orderId": order_id}
+        )
+        orders = response.get('result', {}).get('list', [])
+        return orders[0] if orders else None
+
+    @_bybit_call(default=None)
+    async def get_ticker_price(self, symbol: str, category: str = _DEFAULT_CATEGORY) -> Optional[float]:
         """
         Get current ticker price
-        
+
         Args:
             symbol: Trading pair (e.g., "BTCUSDT")
             category: Product type
-            
+
         Returns:
             Current price or None
         """
-        try:
-            response = self.session.get_tickers(
-                category=category,
-                symbol=symbol
-            )
-            ticker = response.get('result', {}).get('list', [])
-            if ticker:
-                return float(ticker[0].get('lastPrice', 0))
-            return None
-        except Exception as e:
-            logger.error(f"Error getting ticker price: {e}")
-            return None
-    
-    def get_order_history(
+        return await self._get_ticker(symbol, category)
+
+    async def get_ticker_prices(self, symbols: List[str], category: str = _DEFAULT_CATEGORY) -> Dict[str, float]:
+        """
+        Get current ticker prices of several symbols, requested concurrently
+
+        Args:
+            symbols: Trading pairs (e.g., ["BTCUSDT", "ETHUSDT"])
+            category: Product type
+
+        Returns:
+            Dict of symbol to price, symbols that failed are left out
+        """
+        results = await asyncio.gather(
+            *(self._get_ticker(s, category) for s in symbols),
+            return_exceptions=True
+        )
+        prices = {}
+        for symbol, price in zip(symbols, results):
+            if isinstance(price, Exception):
+                logger.error(f"Error getting ticker price for {symbol}: {price}")
+            elif price is not None:
+                prices[symbol] = price
+        return prices
+
+    async def iter_order_history(
         self,
         symbol: Optional[str] = None,
-        category: str = "linear",
+        category: str = _DEFAULT_CATEGORY,
+        page_size: int = ORDER_HISTORY_PAGE
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate the order history, newest first, one page request at a time
+
+        Pages are only requested as the iteration reaches them, so breaking out
+        early (e.g. once an orderId is found) skips the remaining requests.
+
+        Args:
+            symbol: Trading pair (optional)
+            category: Product type
+            page_size: Records per request, up to 50
+
+        Yields:
+            Order dictionaries
+        """
+        params = {
+            "category": category,
+            "limit": min(page_size, ORDER_HISTORY_PAGE)
+        }
+        if symbol:
+            params["symbol"] = symbol
+
+        while True:
+            response = await self._request("GET", "/v5/order/history", params)
+            result = response.get('result', {})
+            for order in result.get('list', []):
+                yield order
+            cursor = result.get('nextPageCursor')
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
+    @_bybit_call(default=[])
+    async def get_order_history(
+        self,
+        symbol: Optional[str] = None,
+        category: str = _DEFAULT_CATEGORY,
         limit: int = 50
     ) -> List[Dict]:
         """
         Get order history
-        
+
         Args:
             symbol: Trading pair (optional)
             category: Product type
             limit: Number of records to return
-            
+
         Returns:
             List of order dictionaries
         """
-        try:
-            params = {
-                "category": category,
-                "limit": limit
-            }
-            if symbol:
-                params["symbol"] = symbol
-                
-            response = self.session.get_order_history(**params)
-            return response.get('result', {}).get('list', [])
-        except Exception as e:
-            logger.error(f"Error getting order history: {e}")
-            return []
-    
-    def set_leverage(self, symbol: str, buy_leverage: int, sell_leverage: int, category: str = "linear") -> Dict:
+        orders = []
+        if limit <= 0:
+            return orders
+        async for order in self.iter_order_history(symbol, category, page_size=limit):
+            orders.append(order)
+            if len(orders) >= limit:
+                break
+        return orders
+
+    @_bybit_call(default=_error_dict, idempotent=False)
+    async def set_leverage(self, symbol: str, buy_leverage: int, sell_leverage: int, category: str = _DEFAULT_CATEGORY) -> Dict:
         """
         Set leverage for a symbol
-        
+
         Args:
             symbol: Trading pair
             buy_leverage: Leverage for long positions
             sell_leverage: Leverage for short positions
             category: Product type
-            
+
         Returns:
             Dict containing response
         """
+        response = await self._request(
+            "POST", "/v5/position/set-leverage",
+            {
+                "category": category,
+                "symbol": symbol,
+                "buyLeverage": str(buy_leverage),
+                "sellLeverage": str(sell_leverage)
+            }
+        )
+        logger.info(f"Leverage set for {symbol}: {response}")
+        return response
+
+
+async def _close_sessions():
+    """
+    Close the shared http sessions of the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    for key, (session_loop, session) in list(_SESSIONS.items()):
+        if session_loop is loop:
+            del _SESSIONS[key]
+            await session.aclose()
+
+
+def run(main):
+    """
+    Run a coroutine to completion, on uvloop if available
+
+    The shared http sessions opened in the run are closed before its loop ends,
+    so run() can be called several times with the same clients.
+
+    Args:
+        main: Coroutine to run, e.g. a function using BybitClient
+
+    Returns:
+        The coroutine result
+    """
+    async def _main():
         try:
-            response = self.session.set_leverage(
-                category=category,
-                symbol=symbol,
-                buyLeverage=str(buy_leverage),
-                sellLeverage=str(sell_leverage)
-            )
-            logger.info(f"Leverage set for {symbol}: {response}")
-            return response
-        except Exception as e:
-            logger.error(f"Error setting leverage: {e}")
-            return {"error": str(e)}
+            return await main
+        finally:
+            await _close_sessions()
+
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(_main())
+    return uvloop.run(_main())
 
 
 # Helper function to parse Discord alerts for crypto symbols
 def parse_crypto_symbol(alert_text: str) -> Optional[str]:
     """
     Parse crypto symbol from Discord alert
-    
+
     Args:
         alert_text: Discord alert message
-        
+
     Returns:
         Formatted symbol for Bybit (e.g., "BTCUSDT")
     """
-    import re
-    
-    # Common crypto patterns
-    patterns = [
-        r'\b(BTC|ETH|SOL|DOGE|XRP|ADA|MATIC|AVAX|DOT|LINK)[/\-]?USDT?\b',
-        r'\b(BTC|ETH|SOL|DOGE|XRP|ADA|MATIC|AVAX|DOT|LINK)\b'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, alert_text, re.IGNORECASE)
-        if match:
-            symbol = match.group(1).upper()
-            return f"{symbol}USDT"
-    
+    up = alert_text.strip().upper()
+    if up in _CANONICAL:
+        return up
+    return _scan_crypto_symbol(alert_text)
+
+
+@functools.lru_cache(maxsize=4096)
+def _scan_crypto_symbol(alert_text: str) -> Optional[str]:
+    """
+    Search a free text alert for a crypto symbol, see parse_crypto_symbol
+    """
+    match = _CRYPTO_RE.search(alert_text)
+    if match:
+        return f"{match.group(1).upper()}USDT"
     return None
@@ -0,0 +1,498 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import orjson
+import websockets
+
+import bybit_api
+from bybit_api import BybitClient, parse_crypto_symbol
+
+
+class TestBybitClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.requests = []
+        self.responses = {}
+        self.handler = None
+        self.client = BybitClient("test_key", "test_secret")
+        self.client.session = httpx.AsyncClient(
+            base_url=bybit_api.MAINNET_URL,
+            transport=httpx.MockTransport(self._handler)
+        )
+
+    async def asyncTearDown(self):
+        await self.client.session.aclose()
+
+    def _handler(self, request):
+        self.requests.append(request)
+        if self.handler is not None:
+            return self.handler(request)
+        body = self.responses.get(request.url.path, {"retCode": 0, "result": {"list": []}})
+        return httpx.Response(200, json=body)
+
+    async def test_signed_get(self):
+        self.responses["/v5/position/list"] = {
+            "retCode": 0, "result": {"list": [{"symbol": "BTCUSDT", "side": "Buy", "size": "0.1"}]}}
+
+        positions = await self.client.get_positions()
+
+        self.assertEqual(positions[0]["symbol"], "BTCUSDT")
+        request = self.requests[0]
+        self.assertEqual(request.url.query, b"category=linear&settleCoin=USDT")
+        prehash = (request.headers["X-BAPI-TIMESTAMP"] + "test_key" + bybit_api.RECV_WINDOW
+                   + "category=linear&settleCoin=USDT")
+        expected = hmac.new(b"test_secret", prehash.encode(), hashlib.sha256).hexdigest()
+        self.assertEqual(request.headers["X-BAPI-SIGN"], expected)
+
+    async def test_place_order_body(self):
+        await self.client.place_order("BTCUSDT", "Buy", "Limit", 0.1, price=60000)
+
+        body = json.loads(self.requests[0].content)
+        self.assertEqual(body["qty"], "0.1")
+        self.assertEqual(body["price"], "60000")
+        self.assertNotIn("stopLoss", body)
+        self.assertNotIn("reduceOnly", body)
+
+    async def test_place_order_small_qty(self):
+        await self.client.place_order("BTCUSDT", "Buy", "Market", 1e-05, stop_loss=59000.5)
+
+        body = json.loads(self.requests[0].content)
+        self.assertEqual(body["qty"], "0.00001")
+        self.assertEqual(body["stopLoss"], "59000.5")
+
+    def test_fmt_num(self):
+        self.assertEqual(bybit_api._fmt_num(Decimal("0.1")), "0.1")
+        self.assertEqual(bybit_api._fmt_num(Decimal("1E-7")), "0.0000001")
+        self.assertEqual(bybit_api._fmt_num(np.float64(0.1)), "0.1")
+        self.assertEqual(bybit_api._fmt_num(np.float64(2e-05)), "0.00002")
+        self.assertEqual(bybit_api._fmt_num(5), "5")
+        self.assertEqual(bybit_api._fmt_num(np.int64(3)), "3")
+
+    async def test_error_retcode(self):
+        self.responses["/v5/order/cancel"] = {"retCode": 110001, "retMsg": "order not exists"}
+
+        response = await self.client.cancel_order("123", "BTCUSDT")
+
+        self.assertIn("order not exists", response["error"])
+
+    async def test_retry_transient(self):
+        statuses = [429, 503]
+
+        def handler(request):
+            if statuses:
+                return httpx.Response(statuses.pop(0))
+            return httpx.Response(200, json={"retCode": 0, "result": {"list": []}})
+        self.handler = handler
+
+        positions = await self.client.get_positions()
+
+        self.assertEqual(positions, [])
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_no_retry(self):
+        # rejected request is not retried
+        self.responses["/v5/order/cancel"] = {"retCode": 110001, "retMsg": "order not exists"}
+        await self.client.cancel_order("123", "BTCUSDT")
+        self.assertEqual(len(self.requests), 1)
+
+        # a new order is not resent after a server error, it may have been placed
+        self.handler = lambda request: httpx.Response(502)
+        response = await self.client.place_order("BTCUSDT", "Buy", "Market", 0.1)
+        self.assertIn("502", response["error"])
+        self.assertEqual(len(self.requests), 2)
+
+        # a resent cancel or leverage change would fail if the first one went through
+        await self.client.cancel_order("123", "BTCUSDT")
+        await self.client.set_leverage("BTCUSDT", 5, 5)
+        self.assertEqual(len(self.requests), 4)
+
+    async def test_get_ticker_prices(self):
+        def handler(request):
+            symbol = request.url.params["symbol"]
+            if symbol == "BADUSDT":
+                return httpx.Response(500)
+            return httpx.Response(200, json={
+                "retCode": 0, "result": {"list": [{"symbol": symbol, "lastPrice": "1.5"}]}})
+        self.handler = handler
+
+        prices = await self.client.get_ticker_prices(["BTCUSDT", "BADUSDT", "ETHUSDT"])
+
+        self.assertEqual(prices, {"BTCUSDT": 1.5, "ETHUSDT": 1.5})
+
+    async def test_cache(self):
+        self.responses["/v5/market/tickers"] = {
+            "retCode": 0, "result": {"list": [{"symbol": "BTCUSDT", "lastPrice": "60000"}]}}
+
+        await self.client.get_ticker_price("BTCUSDT")
+        await self.client.get_ticker_price("BTCUSDT")
+        await self.client.get_positions()
+        await self.client.get_positions()
+        self.assertEqual(len(self.requests), 2)
+
+        # placing an order drops the cached positions
+        await self.client.place_order("BTCUSDT", "Buy", "Market", 0.1)
+        await self.client.get_positions()
+        self.assertEqual(len(self.requests), 4)
+
+    async def test_ticker_stream_prices(self):
+        self.client._handle_ticker_msg(json.dumps({
+            "topic": "tickers.BTCUSDT", "type": "snapshot",
+            "data": {"symbol": "BTCUSDT", "lastPrice": "60000.5"}}), "linear")
+        # delta without lastPrice keeps the previous price
+        self.client._handle_ticker_msg(json.dumps({
+            "topic": "tickers.BTCUSDT", "type": "delta",
+            "data": {"symbol": "BTCUSDT", "bid1Price": "60000"}}), "linear")
+
+        price = await self.client.get_ticker_price("BTCUSDT")
+
+        self.assertEqual(price, 60000.5)
+        self.assertEqual(len(self.requests), 0)
+
+    async def test_ticker_stream_drop(self):
+        prices = []
+
+        class FakeWS:
+            async def send(self, msg):
+                pass
+
+            async def __aiter__(inner):
+                yield json.dumps({"topic": "tickers.BTCUSDT",
+                                  "data": {"symbol": "BTCUSDT", "lastPrice": "60000"}})
+                prices.append(dict(self.client._ws_prices))
+                raise websockets.ConnectionClosed(None, None)
+
+        async def connect(*args, **kwargs):
+            yield FakeWS()
+            prices.append(dict(self.client._ws_prices))
+            raise OSError("connection refused")
+
+        with patch("bybit_api.websockets.connect", connect):
+            with self.assertRaises(OSError):
+                await self.client._start_ticker_ws(["BTCUSDT"])
+
+        self.assertEqual(prices, [{("BTCUSDT", "linear"): 60000.0}, {}])
+        self.assertEqual(self.client._ws_prices, {})
+
+    async def test_close_position(self):
+        self.responses["/v5/position/list"] = {
+            "retCode": 0, "result": {"list": [{"symbol": "ETHUSDT", "side": "Buy", "size": "2"}]}}
+
+        await self.client.close_position("ETHUSDT")
+
+        order = json.loads(self.requests[-1].content)
+        self.assertEqual(order["side"], "Sell")
+        self.assertEqual(order["orderType"], "Market")
+        self.assertEqual(float(order["qty"]), 2)
+        # never opens a reverse position if the cached one was already closed
+        self.assertIs(order["reduceOnly"], True)
+
+    async def test_close_positions(self):
+        self.responses["/v5/position/list"] = {
+            "retCode": 0, "result": {"list": [
+                {"symbol": "ETHUSDT", "side": "Buy", "size": "2"},
+                {"symbol": "BTCUSDT", "side": "Sell", "size": "0.5"}]}}
+
+        results = await self.client.close_positions(["ETHUSDT", "BTCUSDT", "SOLUSDT"])
+
+        self.assertEqual(results["SOLUSDT"], {"error": "No open position"})
+        orders = [json.loads(r.content) for r in self.requests if r.url.path == "/v5/order/create"]
+        self.assertEqual(sorted(o["side"] for o in orders), ["Buy", "Sell"])
+        self.assertTrue(all(o["reduceOnly"] is True for o in orders))
+        # positions fetched once for the whole batch
+        self.assertEqual(sum(r.url.path == "/v5/position/list" for r in self.requests), 1)
+
+    async def test_order_history_pages(self):
+        def handler(request):
+            cursor = request.url.params.get("cursor")
+            page = int(cursor) if cursor else 0
+            orders = [{"orderId": str(page * 50 + i)} for i in range(50)]
+            return httpx.Response(200, json={
+                "retCode": 0, "result": {"list": orders, "nextPageCursor": str(page + 1)}})
+        self.handler = handler
+
+        orders = await self.client.get_order_history(limit=120)
+
+        self.assertEqual(len(orders), 120)
+        self.assertEqual(orders[-1]["orderId"], "119")
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_order_history_encoded_cursor(self):
+        cursor = "page_args%3Dfd43%26symbol%3D6%26"
+
+        def handler(request):
+            last = b"cursor=" in request.url.query
+            return httpx.Response(200, json={"retCode": 0, "result": {
+                "list": [{"orderId": str(len(self.requests))}],
+                "nextPageCursor": "" if last else cursor}})
+        self.handler = handler
+
+        orders = await self.client.get_order_history(limit=5)
+
+        self.assertEqual(len(orders), 2)
+        # the cursor is sent as Bybit returned it, not encoded twice
+        request = self.requests[1]
+        query = "category=linear&limit=5&cursor=" + cursor
+        self.assertEqual(request.url.query, query.encode())
+        prehash = request.headers["X-BAPI-TIMESTAMP"] + "test_key" + bybit_api.RECV_WINDOW + query
+        expected = hmac.new(b"test_secret", prehash.encode(), hashlib.sha256).hexdigest()
+        self.assertEqual(request.headers["X-BAPI-SIGN"], expected)
+
+    async def test_private_stream_state(self):
+        self.client._positions["linear"] = {"BTCUSDT": {"symbol": "BTCUSDT", "side": "Buy", "size": "1"}}
+        self.client._private_ws_connected = True
+        self.client._handle_private_msg(json.dumps({
+            "topic": "position",
+            "data": [{"category": "linear", "symbol": "ETHUSDT", "side": "Sell", "size": "3"}]}))
+        self.client._handle_private_msg(json.dumps({
+            "topic": "order", "data": [{"orderId": "abc", "orderStatus": "Filled"}]}))
+
+        positions = await self.client.get_positions()
+        order = await self.client.get_order("abc")
+
+        self.assertEqual(sorted(p["symbol"] for p in positions), ["BTCUSDT", "ETHUSDT"])
+        self.assertEqual(order["orderStatus"], "Filled")
+        self.assertEqual(len(self.requests), 0)
+        self.assertFalse(self.client._handle_private_msg(json.dumps(
+            {"op": "auth", "success": False, "ret_msg": "invalid key"})))
+
+    async def test_private_stream_other_category(self):
+        self.client._positions["linear"] = {}
+        self.client._private_ws_connected = True
+        self.client._handle_private_msg(json.dumps({
+            "topic": "position",
+            "data": [{"category": "inverse", "symbol": "BTCUSD", "side": "Buy", "size": "1"}]}))
+
+        await self.client.get_positions("inverse")
+
+        # no snapshot for inverse, positions come from REST
+        self.assertNotIn("inverse", self.client._positions)
+        self.assertEqual(self.requests[0].url.params["category"], "inverse")
+
+    def _private_ws(self, failed_op=None):
+        """
+        Fake private websocket class replying to auth and subscribe, failing failed_op
+        """
+        class FakeWS:
+            def __init__(self):
+                self.replies = []
+
+            async def send(self, msg):
+                op = json.loads(msg)["op"]
+                self.replies.append(json.dumps({"op": op, "success": op != failed_op}))
+
+            async def recv(self):
+                return self.replies.pop(0)
+
+            async def close(self):
+                pass
+
+            async def __aiter__(self):
+                return
+                yield
+        return FakeWS
+
+    async def test_private_stream_subscribe_rejected(self):
+        FakeWS = self._private_ws(failed_op="subscribe")
+        connections = []
+
+        async def connect(*args, **kwargs):
+            while True:
+                connections.append(FakeWS())
+                yield connections[-1]
+
+        with patch("bybit_api.websockets.connect", connect):
+            await asyncio.wait_for(self.client._start_private_ws(), 1)
+
+        # stopped without loading or serving a snapshot
+        self.assertEqual(len(connections), 1)
+        self.assertEqual(len(self.requests), 0)
+        self.assertFalse(self.client._private_ws_connected)
+        self.assertFalse(self.client._handle_private_msg(json.dumps(
+            {"op": "subscribe", "success": False, "ret_msg": "no permission"})))
+
+    async def test_private_stream_reconnects(self):
+        statuses = [503]
+
+        def handler(request):
+            if statuses:
+                return httpx.Response(statuses.pop(0))
+            return httpx.Response(200, json={"retCode": 0, "result": {"list": [
+                {"symbol": "BTCUSDT", "side": "Buy", "size": "1"}]}})
+        self.handler = handler
+        seen = []
+
+        class FakeWS(self._private_ws()):
+            async def __aiter__(inner):
+                seen.append(self.client._private_ws_connected)
+                yield json.dumps({"topic": "order", "data": [{"orderId": "abc"}]})
+                seen.append(self.client._private_ws_connected)
+
+        async def connect(*args, **kwargs):
+            for _ in range(2):
+                yield FakeWS()
+
+        with patch("bybit_api.websockets.connect", connect), \
+                patch("bybit_api.WS_RECONNECT_DELAY", 0):
+            await self.client._start_private_ws()
+
+        # first snapshot failed and reconnected, second connection streamed
+        self.assertEqual(seen, [True, True])
+        self.assertFalse(self.client._private_ws_connected)
+
+    async def test_private_stream_prunes_orders(self):
+        with patch("bybit_api.ORDER_DONE_TTL", 0):
+            self.client._handle_private_msg(json.dumps({"topic": "order", "data": [
+                {"orderId": "abc", "orderStatus": "Filled"},
+                {"orderId": "def", "orderStatus": "New"}]}))
+        self.assertEqual(set(self.client._orders), {"abc", "def"})
+
+        await asyncio.sleep(0.01)
+
+        # only open orders are kept
+        self.assertEqual(set(self.client._orders), {"def"})
+
+    async def test_private_stream_stale_order(self):
+        self.client._handle_private_msg(json.dumps({
+            "topic": "order", "data": [{"orderId": "abc", "orderStatus": "New"}]}))
+        self.responses["/v5/order/realtime"] = {
+            "retCode": 0, "result": {"list": [{"orderId": "abc", "orderStatus": "Filled"}]}}
+
+        # not connected, the pushed state is not trusted
+        order = await self.client.get_order("abc")
+
+        self.assertEqual(order["orderStatus"], "Filled")
+
+    def _batch_handler(self, request):
+        orders = json.loads(request.content)["request"]
+        return httpx.Response(200, json={
+            "retCode": 0,
+            "result": {"list": [{"symbol": o["symbol"], "orderId": str(i)} for i, o in enumerate(orders)]},
+            "retExtInfo": {"list": [{"code": 0 if o["symbol"] != "BADUSDT" else 10001,
+                                     "msg": "OK" if o["symbol"] != "BADUSDT" else "bad symbol"}
+                                    for o in orders]}})
+
+    async def test_place_orders_batch(self):
+        self.handler = self._batch_handler
+        orders = [{"symbol": "BTCUSDT", "side": "Buy", "orderType": "Market", "qty": "0.1"}] * 25
+
+        results = await self.client.place_orders_batch(orders)
+
+        self.assertEqual(len(results), 25)
+        self.assertEqual([len(json.loads(r.content)["request"]) for r in self.requests], [20, 5])
+        # both requests of the batch are signed with the same timestamp
+        self.assertEqual(len({r.headers["X-BAPI-TIMESTAMP"] for r in self.requests}), 1)
+
+    async def test_enqueue_order(self):
+        self.handler = self._batch_handler
+
+        results = await asyncio.gather(
+            self.client.enqueue_order("BTCUSDT", "Buy", "Market", 0.1),
+            self.client.enqueue_order("BADUSDT", "Sell", "Market", 1),
+            self.client.enqueue_order("ETHUSDT", "Sell", "Limit", 2, price=3000),
+        )
+        self.client.stop_order_batching()
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0].url.path, "/v5/order/create-batch")
+        self.assertEqual(results[0]["result"]["symbol"], "BTCUSDT")
+        self.assertIn("bad symbol", results[1]["error"])
+        self.assertEqual(results[2]["result"]["symbol"], "ETHUSDT")
+
+    async def test_enqueue_order_categories(self):
+        self.handler = self._batch_handler
+
+        await asyncio.gather(
+            self.client.enqueue_order("BTCUSDT", "Buy", "Market", 0.1),
+            self.client.enqueue_order("ETHUSDT", "Buy", "Market", 1, category="spot"),
+        )
+        self.client.stop_order_batching()
+
+        categories = sorted(json.loads(r.content)["category"] for r in self.requests)
+        self.assertEqual(categories, ["linear", "spot"])
+        self.assertEqual(len({r.headers["X-BAPI-TIMESTAMP"] for r in self.requests}), 1)
+
+    async def test_stop_order_batching_in_flight(self):
+        sent = asyncio.Event()
+
+        async def handler(request):
+            sent.set()
+            await asyncio.sleep(10)
+        self.client.session = httpx.AsyncClient(
+            base_url=bybit_api.MAINNET_URL, transport=httpx.MockTransport(handler))
+
+        order = asyncio.ensure_future(self.client.enqueue_order("BTCUSDT", "Buy", "Market", 0.1))
+        await asyncio.wait_for(sent.wait(), 1)
+        self.client.stop_order_batching()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await asyncio.wait_for(order, 1)
+
+    async def test_batch_unexpected_error(self):
+        self.handler = lambda request: httpx.Response(200, content=b"not json")
+
+        with self.assertRaises(orjson.JSONDecodeError):
+            await asyncio.wait_for(self.client.enqueue_order("BTCUSDT", "Buy", "Market", 0.1), 1)
+
+        # the batch sender is still running for the next orders
+        task = self.client._batch_task
+        self.handler = self._batch_handler
+        result = await asyncio.wait_for(self.client.enqueue_order("BTCUSDT", "Buy", "Market", 0.1), 1)
+        self.assertEqual(result["result"]["symbol"], "BTCUSDT")
+        self.assertIs(self.client._batch_task, task)
+        self.client.stop_order_batching()
+
+
+class TestBybitSession(unittest.TestCase):
+
+    def test_session_per_loop(self):
+        client = BybitClient("test_key", "test_secret")
+
+        async def sessions():
+            async with client:
+                first = client.session
+                self.assertIs(first, client.session)
+                self.assertIs(first, BybitClient("other", "secret").session)
+            self.assertTrue(first.is_closed)
+            return first
+
+        first = asyncio.run(sessions())
+        second = asyncio.run(sessions())
+        self.assertIsNot(first, second)
+
+    def test_run_closes_sessions(self):
+        client = BybitClient("test_key", "test_secret")
+
+        async def session():
+            return client.session
+
+        first = bybit_api.run(session())
+        second = bybit_api.run(session())
+        self.assertTrue(first.is_closed)
+        self.assertTrue(second.is_closed)
+        self.assertIsNot(first, second)
+
+
+class TestParseCryptoSymbol(unittest.TestCase):
+
+    def test_symbols(self):
+        self.assertEqual(parse_crypto_symbol("BTO BTC/USDT @ 60000"), "BTCUSDT")
+        self.assertEqual(parse_crypto_symbol("long eth-usd here"), "ETHUSDT")
+        self.assertEqual(parse_crypto_symbol("SOLUSDT breaking out"), "SOLUSDT")
+        self.assertEqual(parse_crypto_symbol("buying some doge"), "DOGEUSDT")
+        self.assertEqual(parse_crypto_symbol(" xrpusdt\n"), "XRPUSDT")
+
+    def test_no_symbol(self):
+        self.assertIsNone(parse_crypto_symbol("BTO AAPL 150C 06/16 @ 1.5"))
+        self.assertIsNone(parse_crypto_symbol("BTCUSDC is not supported"))
+        self.assertIsNone(parse_crypto_symbol("ETHEREUM"))
+
+
+if __name__ == '__main__':
+    unittest.main()